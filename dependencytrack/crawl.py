@@ -0,0 +1,279 @@
+"""
+Resumable, checkpointed crawls over the project portfolio.
+
+A crawl processes one project at a time, appends the rows
+produced by a handler to a JSON-lines output file and records
+its progress in a local checkpoint file, so that an interrupted
+run can be resumed retrying only the units that failed.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import requests
+
+from . import exc
+
+log = logging.getLogger(__name__)
+
+# Errors that do not invalidate the crawl:
+#  the unit is recorded as failed and retried on the next run.
+RETRYABLE = (
+    exc.InternalServerError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+
+
+def shard_of(key, workers):
+    """Return the worker index in [0, workers) owning `key`.
+
+    The split is stable across processes and machines,
+    since it does not depend on the python hash seed.
+    """
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return int(digest, 16) % workers
+
+
+class Checkpoint:
+    """The crawl progress, persisted to a local json file.
+
+    `pending` and `lookups` are insertion-ordered dicts used as queues,
+    `resolved` holds the purls already looked up, and `offset` is the
+    output size after the last completed unit.
+    """
+
+    def __init__(self, path, worker=0, workers=1):
+        self.path = Path(path)
+        self.worker = worker
+        self.workers = workers
+        self.seeded = False
+        self.output = None
+        self.pending = {}
+        self.lookups = {}
+        self.resolved = set()
+        self.done = set()
+        self.failed = {}
+        self.offset = 0
+
+    @classmethod
+    def load(cls, path, worker=0, workers=1):
+        """Load a checkpoint from `path`, or create an empty one."""
+        checkpoint = cls(path, worker=worker, workers=workers)
+        if not checkpoint.path.exists():
+            return checkpoint
+        data = json.loads(checkpoint.path.read_text())
+        if (data["worker"], data["workers"]) != (worker, workers):
+            raise ValueError(
+                f"Checkpoint {path} belongs to worker"
+                f" {data['worker']}/{data['workers']}, not {worker}/{workers}"
+            )
+        checkpoint.seeded = data["seeded"]
+        checkpoint.output = data["output"]
+        checkpoint.pending = dict.fromkeys(data["pending"])
+        checkpoint.lookups = dict.fromkeys(data["lookups"])
+        checkpoint.resolved = set(data["resolved"])
+        checkpoint.done = set(data["done"])
+        checkpoint.failed = data["failed"]
+        checkpoint.offset = data["offset"]
+        return checkpoint
+
+    def save(self):
+        """Atomically write the checkpoint to disk."""
+        data = {
+            "worker": self.worker,
+            "workers": self.workers,
+            "seeded": self.seeded,
+            "output": self.output,
+            "pending": list(self.pending),
+            "lookups": list(self.lookups),
+            "resolved": list(self.resolved),
+            "done": list(self.done),
+            "failed": self.failed,
+            "offset": self.offset,
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, self.path)
+
+    @property
+    def finished(self):
+        return self.seeded and not (self.pending or self.lookups or self.failed)
+
+
+class Crawler:
+    """Run a handler over every project of a worker shard.
+
+    The handler is called with a `Project` and returns an iterable
+    of json-serializable rows. It can schedule identity lookups
+    via `Crawler.lookup`: the projects owning the looked-up purl
+    are then crawled too, e.g. to resolve internal dependencies.
+    Looked-up projects owned by another shard are left to their
+    worker, so split only crawls seeded with the whole portfolio.
+
+    The checkpoint is saved every `save_every` units or `save_interval`
+    seconds, and when the run stops: after a crash, the units processed
+    since the last save are crawled again and their rows rewritten.
+
+    Example:
+
+        crawler = Crawler(client, "crawl.ckpt", worker=0, workers=4)
+        crawler.run(handler, "report-0.jsonl", searchText="my-app")
+    """
+
+    def __init__(
+        self,
+        client,
+        checkpoint_file,
+        worker=0,
+        workers=1,
+        max_attempts=3,
+        save_every=100,
+        save_interval=30,
+    ):
+        if not 0 <= worker < workers:
+            raise ValueError(f"Invalid worker {worker} for {workers} workers")
+        self.client = client
+        self.max_attempts = max_attempts
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self.checkpoint = Checkpoint.load(
+            checkpoint_file, worker=worker, workers=workers
+        )
+
+    def owns(self, uuid):
+        return shard_of(uuid, self.checkpoint.workers) == self.checkpoint.worker
+
+    def enqueue(self, uuid):
+        """Schedule a project, if it belongs to this shard and was not crawled."""
+        ckpt = self.checkpoint
+        if not self.owns(uuid) or uuid in ckpt.done:
+            return
+        if f"project:{uuid}" in ckpt.failed:
+            return
+        ckpt.pending.setdefault(uuid)
+
+    def lookup(self, purl):
+        """Schedule an identity lookup for `purl`, unless already resolved."""
+        if purl not in self.checkpoint.resolved:
+            self.checkpoint.lookups.setdefault(purl)
+
+    def seed(self, **kwargs):
+        """Enqueue the projects returned by `project.list(**kwargs)`."""
+        for project in self.client.project.list(fields=["uuid"], **kwargs):
+            self.enqueue(project["uuid"])
+        self.checkpoint.seeded = True
+        self.checkpoint.save()
+
+    def _resolve(self, purl):
+        components = self.client.component.identity.list(
+            purl=purl, fields=["purl", "project"]
+        )
+        for component in components:
+            project = component.get("project", {})
+            if project.get("purl") == purl:
+                self.enqueue(project["uuid"])
+
+    def _fail(self, unit, e):
+        attempts = self.checkpoint.failed.get(unit, {}).get("attempts", 0) + 1
+        log.warning(f"Failed {unit} (attempt {attempts}): {e}")
+        self.checkpoint.failed[unit] = {"attempts": attempts, "error": str(e)}
+
+    def _retry_failed(self):
+        """Move the failed units back to their queues."""
+        ckpt = self.checkpoint
+        for unit, failure in list(ckpt.failed.items()):
+            if failure["attempts"] >= self.max_attempts:
+                continue
+            kind, _, key = unit.partition(":")
+            queue = ckpt.lookups if kind == "lookup" else ckpt.pending
+            queue.setdefault(key)
+
+    def _open_output(self, output_file):
+        """Open the output file, dropping the rows written after the checkpoint."""
+        ckpt = self.checkpoint
+        output_file = Path(output_file).resolve()
+        if ckpt.output is None:
+            ckpt.output = str(output_file)
+        elif ckpt.output != str(output_file):
+            raise ValueError(
+                f"Checkpoint {ckpt.path} belongs to output {ckpt.output},"
+                f" not {output_file}"
+            )
+        if ckpt.offset == 0:
+            output_file.touch()
+        elif not output_file.exists() or output_file.stat().st_size < ckpt.offset:
+            raise ValueError(
+                f"Output {output_file} is shorter than the checkpoint offset"
+                f" {ckpt.offset}: was it removed or replaced?"
+            )
+        fh = output_file.open("r+b")
+        fh.truncate(ckpt.offset)
+        fh.seek(ckpt.offset)
+        return fh
+
+    def _step(self, handler, fh):
+        """Process the next lookup or project."""
+        ckpt = self.checkpoint
+        if ckpt.lookups:
+            purl = next(iter(ckpt.lookups))
+            try:
+                self._resolve(purl)
+                ckpt.resolved.add(purl)
+                ckpt.failed.pop(f"lookup:{purl}", None)
+            except RETRYABLE as e:
+                self._fail(f"lookup:{purl}", e)
+            del ckpt.lookups[purl]
+            return
+
+        uuid = next(iter(ckpt.pending))
+        try:
+            project = self.client.project.get(uuid)
+            rows = [json.dumps(row) + "\n" for row in handler(project)]
+        except exc.NotFound:
+            # The project was removed after seeding.
+            log.info(f"Skipping missing project {uuid}")
+            rows = []
+        except RETRYABLE as e:
+            self._fail(f"project:{uuid}", e)
+            del ckpt.pending[uuid]
+            return
+        fh.write("".join(rows).encode())
+        ckpt.failed.pop(f"project:{uuid}", None)
+        ckpt.done.add(uuid)
+        del ckpt.pending[uuid]
+        # Only now the rows belong to a completed unit:
+        #  an interruption before this line drops them on resume.
+        ckpt.offset = fh.tell()
+
+    def run(self, handler, output_file, **kwargs):
+        """Crawl the shard, appending the handler rows to `output_file`.
+
+        Further kwargs are passed to `project.list` when seeding
+        a new checkpoint. Return the failed units.
+        """
+        ckpt = self.checkpoint
+        if not ckpt.seeded:
+            self.seed(**kwargs)
+        self._retry_failed()
+
+        with self._open_output(output_file) as fh:
+            unsaved, saved_at = 0, time.monotonic()
+            try:
+                while ckpt.lookups or ckpt.pending:
+                    self._step(handler, fh)
+                    unsaved += 1
+                    if (
+                        unsaved >= self.save_every
+                        or time.monotonic() - saved_at >= self.save_interval
+                    ):
+                        fh.flush()
+                        ckpt.save()
+                        unsaved, saved_at = 0, time.monotonic()
+            finally:
+                fh.flush()
+                ckpt.save()
+        return ckpt.failed
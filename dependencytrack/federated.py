@@ -0,0 +1,164 @@
+"""
+A client querying multiple Dependency-Track instances concurrently.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import requests
+import yaml
+
+from . import exc
+from .client import DependencyTrack, DTProxy
+
+log = logging.getLogger(__name__)
+
+
+class FederatedStream:
+    """The tagged results of a call to several Dependency-Track instances.
+
+    Results are yielded in completion order. When `strict` is False,
+    instances raising a `BaseDTException` or a connection error
+    are logged and recorded in `errors` instead of failing the call.
+    When `strict` is True, the first error is raised immediately:
+    calls still running on the other instances complete in background
+    and their results are discarded.
+    """
+
+    def __init__(self, federated, fn, strict=True):
+        self.federated = federated
+        self.fn = fn
+        self.strict = strict
+        self.errors = {}
+
+    def __iter__(self):
+        self.errors = {}
+        clients = self.federated.clients
+        if not clients:
+            return
+        executor = ThreadPoolExecutor(
+            max_workers=self.federated.max_workers or len(clients)
+        )
+        try:
+            futures = {
+                executor.submit(self.fn, client): name
+                for name, client in clients.items()
+            }
+            for future in as_completed(futures):
+                origin = futures[future]
+                try:
+                    result = future.result()
+                except requests.exceptions.RequestException as e:
+                    if self.strict:
+                        raise
+                    log.warning(f"Error querying {origin}: {e}")
+                    self.errors[origin] = e
+                    continue
+                yield from self.federated._tag(result, origin)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class FederatedDependencyTrack:
+    """Issue the same call to several Dependency-Track instances.
+
+    Calls run concurrently, by default one thread per instance,
+    so a query takes as long as the slowest instance. Results are streamed
+    as soon as each instance replies, tagged with the instance
+    name in the `origin_key` field.
+
+    Example:
+
+        fed = FederatedDependencyTrack.from_config_files("bu-1.yaml", "bu-2.yaml")
+        for project in fed.project_list(searchText="my-app"):
+            print(project["origin"], project["name"])
+    """
+
+    origin_key = "origin"
+
+    def __init__(self, clients: dict, max_workers=None):
+        self.clients = clients
+        self.max_workers = max_workers
+
+    @classmethod
+    def from_config(cls, configs: dict, **kwargs):
+        """Create a client from a dict of instance name to `DependencyTrack` kwargs."""
+        return cls(
+            {name: DependencyTrack(**config) for name, config in configs.items()},
+            **kwargs,
+        )
+
+    @classmethod
+    def from_config_files(cls, *config_files, **kwargs):
+        """Create a client from config files, named after the file stem.
+
+        Use `from_config` to name instances whose files share the same stem.
+        """
+        configs = {}
+        for config_file in config_files:
+            config_file = Path(config_file).expanduser()
+            if config_file.stem in configs:
+                raise ValueError(
+                    f"Duplicate instance name {config_file.stem} for {config_file}"
+                )
+            configs[config_file.stem] = yaml.safe_load(config_file.read_text())
+        return cls.from_config(configs, **kwargs)
+
+    def _tag(self, result, origin):
+        """Yield the items in `result` tagged with their origin.
+
+        `result` is None, a `DTProxy`, a dict or a list of them.
+        """
+        if result is None:
+            return
+        if isinstance(result, DTProxy):
+            result.data[self.origin_key] = origin
+            yield result
+        elif isinstance(result, dict):
+            yield dict(result, **{self.origin_key: origin})
+        elif isinstance(result, (list, tuple)):
+            for item in result:
+                yield from self._tag(item, origin)
+        else:
+            raise TypeError(f"Cannot tag {type(result).__name__} results from {origin}")
+
+    def stream(self, fn, strict=True):
+        """Call `fn(client)` on every instance and return a `FederatedStream`.
+
+        Iterate the stream to run the calls and get the tagged results.
+        """
+        return FederatedStream(self, fn, strict=strict)
+
+    def project_list(self, fields=None, strict=True, **kwargs):
+        """List the projects of all the instances."""
+        return self.stream(
+            lambda client: client.project.list(fields=fields, **kwargs), strict=strict
+        )
+
+    def component_list(self, fields=None, strict=True, **kwargs):
+        """List the components of all the instances."""
+        return self.stream(
+            lambda client: client.component.list(fields=fields, **kwargs),
+            strict=strict,
+        )
+
+    def component_identity_list(self, fields=None, strict=True, **kwargs):
+        """Lookup components by identity (e.g. purl) on all the instances."""
+        return self.stream(
+            lambda client: client.component.identity.list(fields=fields, **kwargs),
+            strict=strict,
+        )
+
+    def project_lookup(self, name, version, strict=True):
+        """Lookup a project by name and version on all the instances.
+
+        Instances where the project does not exist are skipped.
+        """
+
+        def lookup(client):
+            try:
+                return client.project.lookup(qp={"name": name, "version": version})
+            except exc.NotFound:
+                return None
+
+        return self.stream(lookup, strict=strict)
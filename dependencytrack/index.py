@@ -0,0 +1,334 @@
+"""
+A local search index over project components and services.
+
+The index is built from the component and service listings
+of each project, persisted to a json file and updated
+incrementally, so that queries like "which projects use
+log4j-core < 2.17" do not hit the server.
+"""
+import bisect
+import difflib
+import json
+import logging
+import os
+import re
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import unquote
+
+log = logging.getLogger(__name__)
+
+FIELDS = ("name", "group", "namespace", "version", "text")
+COMPONENT_FIELDS = ["uuid", "name", "group", "version", "purl"]
+SERVICE_FIELDS = ["uuid", "name", "group", "version"]
+
+_VERSION_SEP = re.compile(r"[.\-+_]")
+_VERSION_PART = re.compile(r"\d+|[^\d]+")
+_RANGE_OP = re.compile(r"^(<=|>=|==|!=|<|>|=)?\s*(.+)$")
+_TEXT_SEP = re.compile(r"[^a-z0-9]+")
+_RELEASE_QUALIFIERS = {"final", "ga", "release"}
+_VERSION_PREFIX = re.compile(r"^v(?=\d)")
+
+
+def parse_purl(purl):
+    """Split a package url into type, namespace, name and version."""
+    if not purl or not purl.startswith("pkg:"):
+        return {}
+    purl = purl[4:].split("#", 1)[0].split("?", 1)[0]
+    purl, _, version = purl.partition("@")
+    type_, _, path = purl.partition("/")
+    namespace, _, name = path.rpartition("/")
+    return {
+        "type": type_.lower(),
+        "namespace": unquote(namespace),
+        "name": unquote(name),
+        "version": unquote(version),
+    }
+
+
+def version_key(version):
+    """Return a sort key for a version string.
+
+    Numeric parts compare as integers, and alphanumeric
+    parts (e.g. "rc1", "beta") sort before the release:
+    2.17.0-rc1 < 2.17.0 < 2.17.0.1 < 2.17.1
+    Trailing zeros and release qualifiers are ignored,
+    so 2.17 == 2.17.0 == 2.17.0.Final, and so is the
+    "v" prefix of git tags and go modules: v2.17.0 == 2.17
+    """
+    version = _VERSION_PREFIX.sub("", str(version).strip().lower())
+    parts = []
+    for segment in _VERSION_SEP.split(version):
+        for part in _VERSION_PART.findall(segment):
+            if part in _RELEASE_QUALIFIERS:
+                continue
+            parts.append(int(part) if part.isdigit() else part)
+
+    # Strip the trailing zeros of the release number (e.g. 2.17.0-rc1)
+    #  and of the whole version (e.g. 2.17-rc1.0).
+    release = 0
+    while release < len(parts) and isinstance(parts[release], int):
+        release += 1
+    while release > 0 and parts[release - 1] == 0:
+        release -= 1
+        del parts[release]
+    while parts and parts[-1] == 0:
+        parts.pop()
+
+    key = [(2, p, "") if isinstance(p, int) else (0, 0, p) for p in parts]
+    key.append((1, 0, ""))
+    return tuple(key)
+
+
+def parse_range(spec):
+    """Parse a comma-separated version range like ">=2.0, <2.17"."""
+    constraints = []
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        op, version = _RANGE_OP.match(item.strip()).groups()
+        constraints.append(("==" if op in (None, "=") else op, version_key(version)))
+    return constraints
+
+
+def version_matches(version, constraints):
+    """Check whether `version` satisfies the parsed range `constraints`."""
+    key = version_key(version)
+    for op, bound in constraints:
+        if op == "<" and not key < bound:
+            return False
+        if op == "<=" and not key <= bound:
+            return False
+        if op == ">" and not key > bound:
+            return False
+        if op == ">=" and not key >= bound:
+            return False
+        if op == "==" and key != bound:
+            return False
+        if op == "!=" and key == bound:
+            return False
+    return True
+
+
+def _tokens(doc):
+    """Yield the (field, token) pairs indexing a document."""
+    for field in ("name", "group", "namespace", "version"):
+        if value := doc.get(field):
+            yield field, value.lower()
+    for field in ("name", "group", "namespace"):
+        for token in _TEXT_SEP.split((doc.get(field) or "").lower()):
+            if token:
+                yield "text", token
+
+
+class ComponentIndex:
+    """An inverted index on component name, group, purl namespace and version.
+
+    Example:
+
+        index = ComponentIndex.load("components.idx")
+        index.sync(client)
+        index.save("components.idx")
+        index.projects(name="log4j-core", version="<2.17")
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.project_docs = {}
+        self.project_data = {}
+        self.postings = {field: defaultdict(set) for field in FIELDS}
+        self._vocabulary = {}
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _add(self, doc):
+        doc_id = self._next_id
+        self._next_id += 1
+        self.docs[doc_id] = doc
+        for field, token in _tokens(doc):
+            self.postings[field][token].add(doc_id)
+            self._vocabulary.pop(field, None)
+        return doc_id
+
+    def _remove(self, doc_id):
+        doc = self.docs.pop(doc_id)
+        for field, token in _tokens(doc):
+            postings = self.postings[field][token]
+            postings.discard(doc_id)
+            if not postings:
+                del self.postings[field][token]
+                self._vocabulary.pop(field, None)
+
+    def remove_project(self, uuid):
+        """Drop all the documents of a project."""
+        for doc_id in self.project_docs.pop(uuid, []):
+            self._remove(doc_id)
+        self.project_data.pop(uuid, None)
+
+    def update(self, project, components=(), services=()):
+        """Replace the indexed components and services of a project.
+
+        `project` is a dict with at least the project "uuid".
+        """
+        uuid = project["uuid"]
+        self.remove_project(uuid)
+        self.project_data[uuid] = {
+            k: project.get(k) for k in ("uuid", "name", "version", "lastBomImport")
+        }
+        doc_ids = []
+        for classifier, entries in (("component", components), ("service", services)):
+            for entry in entries:
+                purl = entry.get("purl")
+                doc = {
+                    "project": uuid,
+                    "classifier": classifier,
+                    "name": entry.get("name"),
+                    "group": entry.get("group"),
+                    "version": entry.get("version"),
+                    "purl": purl,
+                    "namespace": parse_purl(purl).get("namespace"),
+                }
+                doc_ids.append(self._add(doc))
+        self.project_docs[uuid] = doc_ids
+
+    def update_project(self, project):
+        """Fetch and index the components and services of a `Project`."""
+        self.update(
+            project.data,
+            components=project.component.list(fields=COMPONENT_FIELDS),
+            services=project.service.list(fields=SERVICE_FIELDS),
+        )
+
+    def sync(self, client, **kwargs):
+        """Reindex the projects whose BOM changed since the last sync.
+
+        Further kwargs are passed to `project.list`: when no filter
+        is given, projects removed from the server are dropped too.
+        """
+        projects = client.project.list(
+            fields=["uuid", "name", "version", "lastBomImport"], **kwargs
+        )
+        listed = set()
+        for project in projects:
+            uuid = project["uuid"]
+            listed.add(uuid)
+            indexed = self.project_data.get(uuid)
+            last_import = project.get("lastBomImport")
+            # Projects without a BOM import may still change: always reindex them.
+            if indexed and last_import and indexed["lastBomImport"] == last_import:
+                continue
+            log.debug(f"Indexing project {uuid}")
+            self.update_project(client.project.get(uuid))
+        if not kwargs:
+            for uuid in set(self.project_data) - listed:
+                self.remove_project(uuid)
+
+    def vocabulary(self, field):
+        """Return the sorted tokens of a field."""
+        if field not in self._vocabulary:
+            self._vocabulary[field] = sorted(self.postings[field])
+        return self._vocabulary[field]
+
+    def _match(self, field, value, prefix=False, fuzzy=False):
+        value = value.lower()
+        postings = self.postings[field]
+        if prefix:
+            vocabulary = self.vocabulary(field)
+            start = bisect.bisect_left(vocabulary, value)
+            end = bisect.bisect_left(vocabulary, value + "\uffff")
+            tokens = vocabulary[start:end]
+        elif fuzzy:
+            tokens = difflib.get_close_matches(
+                value, self.vocabulary(field), n=10, cutoff=0.8
+            )
+        else:
+            tokens = [value]
+        ret = set()
+        for token in tokens:
+            ret |= postings.get(token, set())
+        return ret
+
+    def search(
+        self,
+        name=None,
+        group=None,
+        namespace=None,
+        version=None,
+        text=None,
+        prefix=False,
+        fuzzy=False,
+    ):
+        """Return the documents matching all the given criteria.
+
+        `version` is a version range like "<2.17" or ">=2.0,<2.17";
+        `text` matches any word of name, group or purl namespace.
+        `prefix` and `fuzzy` apply to the `name`, `group`,
+        `namespace` and `text` criteria.
+        """
+        candidates = None
+        for field, value in (
+            ("name", name),
+            ("group", group),
+            ("namespace", namespace),
+            ("text", text),
+        ):
+            if value is None:
+                continue
+            matches = self._match(field, value, prefix=prefix, fuzzy=fuzzy)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+
+        if version is not None:
+            constraints = parse_range(version)
+            if candidates is None:
+                candidates = set()
+                for token, doc_ids in self.postings["version"].items():
+                    if version_matches(token, constraints):
+                        candidates |= doc_ids
+            else:
+                candidates = {
+                    doc_id
+                    for doc_id in candidates
+                    if self.docs[doc_id].get("version")
+                    and version_matches(self.docs[doc_id]["version"], constraints)
+                }
+        if candidates is None:
+            candidates = self.docs
+        return [self.docs[doc_id] for doc_id in sorted(candidates)]
+
+    def projects(self, **kwargs):
+        """Return the projects using the components matching `search(**kwargs)`."""
+        uuids = {doc["project"] for doc in self.search(**kwargs)}
+        return [self.project_data[uuid] for uuid in sorted(uuids)]
+
+    def save(self, path):
+        """Atomically persist the index to a json file."""
+        data = {
+            "projects": [
+                dict(
+                    project=self.project_data[uuid],
+                    docs=[self.docs[doc_id] for doc_id in doc_ids],
+                )
+                for uuid, doc_ids in self.project_docs.items()
+            ]
+        }
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index from `path`, or create an empty one."""
+        index = cls()
+        path = Path(path)
+        if not path.exists():
+            return index
+        for entry in json.loads(path.read_text())["projects"]:
+            uuid = entry["project"]["uuid"]
+            index.project_data[uuid] = entry["project"]
+            index.project_docs[uuid] = [index._add(doc) for doc in entry["docs"]]
+        return index
@@ -0,0 +1,303 @@
+"""
+Client-side evaluation of license, version and purl policies.
+
+Components are loaded into a columnar table where each column
+is dictionary-encoded: rules are evaluated once per distinct value
+and the result is broadcast to all the rows via numpy indexing,
+so that millions of rows are checked without hitting the server.
+
+This module requires numpy: pip install dependencytrack-py[policy]
+"""
+import logging
+import re
+from fnmatch import fnmatchcase
+
+from .index import parse_range, version_matches
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+log = logging.getLogger(__name__)
+
+COLUMNS = ("project", "name", "group", "version", "purl", "license", "expression")
+COMPONENT_FIELDS = [
+    "name",
+    "group",
+    "version",
+    "purl",
+    "license",
+    "licenseExpression",
+    "resolvedLicense",
+]
+
+_SPDX_TOKEN = re.compile(r"\(|\)|[^\s()]+")
+
+
+def component_license(component):
+    """Return the license id or free-text license name of a component, or ""."""
+    resolved = component.get("resolvedLicense") or {}
+    return resolved.get("licenseId") or component.get("license") or ""
+
+
+def license_alternatives(expression):
+    """Expand an SPDX expression into the alternative sets of licenses.
+
+    E.g. "MIT OR (Apache-2.0 AND BSD-3-Clause)" returns
+    [{"MIT"}, {"Apache-2.0", "BSD-3-Clause"}]. License exceptions
+    ("GPL-2.0-only WITH Classpath-exception-2.0") are ignored.
+    As in SPDX, the AND, OR and WITH operators are case-sensitive.
+    """
+    tokens = _SPDX_TOKEN.findall(expression)
+
+    def parse_or():
+        alternatives = parse_and()
+        while tokens and tokens[0] == "OR":
+            tokens.pop(0)
+            alternatives = alternatives + parse_and()
+        return alternatives
+
+    def parse_and():
+        alternatives = parse_atom()
+        while tokens and tokens[0] == "AND":
+            tokens.pop(0)
+            alternatives = [a | b for a in alternatives for b in parse_atom()]
+        return alternatives
+
+    def parse_atom():
+        if not tokens:
+            raise ValueError(f"Invalid license expression: {expression}")
+        token = tokens.pop(0)
+        if token == "(":
+            alternatives = parse_or()
+            if not tokens or tokens.pop(0) != ")":
+                raise ValueError(f"Invalid license expression: {expression}")
+            return alternatives
+        if tokens and tokens[0] == "WITH":
+            del tokens[:2]
+        return [frozenset([token])]
+
+    if not tokens:
+        return []
+    alternatives = parse_or()
+    if tokens:
+        raise ValueError(f"Invalid license expression: {expression}")
+    return alternatives
+
+
+class Column:
+    """A dictionary-encoded column: distinct values and per-row codes."""
+
+    def __init__(self, values):
+        lookup = {}
+        self.codes = np.fromiter(
+            (lookup.setdefault(v or "", len(lookup)) for v in values),
+            dtype=np.int64,
+        )
+        self.uniques = np.array(list(lookup), dtype=object)
+        self._lookup = lookup
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, row):
+        return self.uniques[self.codes[row]]
+
+    def where(self, predicate):
+        """Return the mask of the rows whose value satisfies `predicate`."""
+        matches = np.fromiter(
+            (bool(predicate(v)) for v in self.uniques),
+            dtype=bool,
+            count=len(self.uniques),
+        )
+        return matches[self.codes]
+
+    def isin(self, values):
+        """Return the mask of the rows whose value is in `values`."""
+        matches = np.zeros(len(self.uniques), dtype=bool)
+        matches[[self._lookup[v] for v in values if v in self._lookup]] = True
+        return matches[self.codes]
+
+
+class ComponentTable:
+    """A columnar table of components, one row per (project, component)."""
+
+    def __init__(self, records):
+        if np is None:
+            raise ImportError(
+                "ComponentTable requires numpy: pip install dependencytrack-py[policy]"
+            )
+        records = list(records)
+        self.columns = {
+            column: Column(r.get(column) for r in records) for column in COLUMNS
+        }
+
+    def __len__(self):
+        return len(self.columns["project"])
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def row(self, i):
+        return {column: self.columns[column][i] for column in COLUMNS}
+
+    @classmethod
+    def from_components(cls, components):
+        """Create a table from an iterable of (project uuid, component list)."""
+        return cls(
+            {
+                "project": uuid,
+                "name": c.get("name"),
+                "group": c.get("group"),
+                "version": c.get("version"),
+                "purl": c.get("purl"),
+                "license": component_license(c),
+                "expression": c.get("licenseExpression"),
+            }
+            for uuid, project_components in components
+            for c in project_components
+        )
+
+    @classmethod
+    def from_projects(cls, projects):
+        """Fetch the components of each `Project` and create a table."""
+        return cls.from_components(
+            (project.uuid, project.component.list(fields=COMPONENT_FIELDS))
+            for project in projects
+        )
+
+
+class LicenseRule:
+    """Components whose license is denied, or not explicitly allowed.
+
+    SPDX license expressions are satisfied by any alternative whose
+    licenses are all allowed and not denied: "MIT OR GPL-3.0-only" does
+    not violate `deny=["GPL-3.0-only"]`. Components without an expression
+    are checked on their license id or free-text name, compared as is.
+    When an `allow` list is given, components without a license
+    are violations too.
+    """
+
+    def __init__(self, allow=None, deny=(), name=None):
+        self.allow = None if allow is None else frozenset(allow)
+        self.deny = frozenset(deny)
+        if name is None:
+            name = "license"
+            if self.allow is not None:
+                name += f" allow={','.join(sorted(self.allow))}"
+            if self.deny:
+                name += f" deny={','.join(sorted(self.deny))}"
+        self.name = name
+
+    def _violates(self, alternatives):
+        if not alternatives:
+            return self.allow is not None
+        return not any(
+            not (licenses & self.deny)
+            and (self.allow is None or licenses <= self.allow)
+            for licenses in alternatives
+        )
+
+    def violates_license(self, license_id):
+        """Check a license id or free-text name."""
+        return self._violates([frozenset([license_id])] if license_id else [])
+
+    def violates_expression(self, expression):
+        """Check an SPDX license expression."""
+        try:
+            alternatives = license_alternatives(expression)
+        except ValueError:
+            log.warning(f"Cannot parse license expression {expression}")
+            alternatives = [frozenset([expression])]
+        return self._violates(alternatives)
+
+    def evaluate(self, table):
+        expressions = table["expression"]
+        has_expression = expressions.where(bool)
+        return np.where(
+            has_expression,
+            expressions.where(self.violates_expression),
+            table["license"].where(self.violates_license),
+        )
+
+
+class VersionRule:
+    """Components matching the `component` name pattern in a forbidden version range.
+
+    Example: VersionRule("log4j-core", "<2.17", group="org.apache.logging.log4j")
+    """
+
+    def __init__(self, component, versions, group=None, name=None):
+        self.component = component
+        self.group = group
+        self.versions = versions
+        self.constraints = parse_range(versions)
+        self.name = name or f"{component} {versions}"
+
+    def evaluate(self, table):
+        mask = table["name"].where(lambda v: fnmatchcase(v, self.component))
+        if self.group is not None:
+            mask &= table["group"].where(lambda v: fnmatchcase(v, self.group))
+        mask &= table["version"].where(
+            lambda v: v and version_matches(v, self.constraints)
+        )
+        return mask
+
+
+class PurlRule:
+    """Components whose purl matches a denied glob pattern, e.g. "pkg:npm/*"."""
+
+    def __init__(self, pattern, name=None):
+        self.pattern = pattern
+        self.name = name or pattern
+
+    def evaluate(self, table):
+        return table["purl"].where(lambda v: fnmatchcase(v, self.pattern))
+
+
+class PolicyEngine:
+    """Evaluate a list of rules over a `ComponentTable`.
+
+    Example:
+
+        table = ComponentTable.from_projects(
+            client.project.get(p["uuid"]) for p in client.project.list()
+        )
+        engine = PolicyEngine([
+            LicenseRule(deny=["GPL-3.0-only", "AGPL-3.0-only"]),
+            VersionRule("log4j-core", "<2.17"),
+            PurlRule("pkg:maven/com.example.legacy/*"),
+        ])
+        violations = engine.evaluate(table)
+    """
+
+    def __init__(self, rules):
+        names = [rule.name for rule in rules]
+        if duplicates := sorted({n for n in names if names.count(n) > 1}):
+            raise ValueError(f"Duplicate rule names: {duplicates}")
+        self.rules = rules
+
+    def masks(self, table):
+        """Return a dict of rule name to the mask of violating rows."""
+        return {rule.name: rule.evaluate(table) for rule in self.rules}
+
+    def count(self, table):
+        """Return the number of violations per project and rule."""
+        projects = table["project"]
+        ret = {}
+        for rule, mask in self.masks(table).items():
+            counts = np.bincount(projects.codes[mask], minlength=len(projects.uniques))
+            for code in np.flatnonzero(counts):
+                ret.setdefault(projects.uniques[code], {})[rule] = int(counts[code])
+        return ret
+
+    def evaluate(self, table):
+        """Return the violating components, grouped by project."""
+        ret = {}
+        for rule, mask in self.masks(table).items():
+            for i in np.flatnonzero(mask):
+                violation = dict(table.row(i), rule=rule)
+                ret.setdefault(violation.pop("project"), []).append(violation)
+        log.debug(f"Found violations in {len(ret)} projects")
+        return ret
@@ -13,6 +13,7 @@ setuptools.setup(
     long_description_content_type="text/plain",
     url="https://github.com/ioggstream/dependencytrack-py",
     packages=setuptools.find_packages(),
+    extras_require={"policy": ["numpy"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: GNU General Public License v2 (GPLv2)",
@@ -0,0 +1,158 @@
+import json
+
+import pytest
+
+import dependencytrack as dt
+from dependencytrack.crawl import Checkpoint, Crawler, shard_of
+
+
+class FakeProxy:
+    def __init__(self, items, failures=None):
+        self.items = items
+        self.failures = failures if failures is not None else {}
+        self.identity = self
+        self.lookups = 0
+
+    def list(self, fields=None, **kwargs):
+        if "purl" in kwargs:
+            self.lookups += 1
+            return self.items.get(kwargs["purl"], [])
+        return [{"uuid": uuid} for uuid in self.items]
+
+    def get(self, uuid):
+        if uuid not in self.items:
+            raise dt.exc.NotFound(status=404)
+        if self.failures.get(uuid):
+            self.failures[uuid] -= 1
+            raise dt.exc.InternalServerError(status=500)
+        return dt.Project(client=None, path=f"project/{uuid}", data=self.items[uuid])
+
+
+class FakeClient:
+    def __init__(self, projects, identities=None, failures=None):
+        self.project = FakeProxy(projects, failures)
+        self.component = FakeProxy(identities or {})
+
+
+@pytest.fixture
+def projects():
+    return {
+        f"uuid-{i}": {"uuid": f"uuid-{i}", "name": f"project-{i}"} for i in range(10)
+    }
+
+
+def handler(project):
+    yield {"name": project["name"]}
+
+
+def read_rows(path):
+    return [json.loads(line)["name"] for line in path.read_text().splitlines()]
+
+
+def test_shard_of_splits_all_keys():
+    keys = [f"uuid-{i}" for i in range(100)]
+    shards = [shard_of(k, 3) for k in keys]
+    assert set(shards) == {0, 1, 2}
+    assert shards == [shard_of(k, 3) for k in keys]
+
+
+def test_crawl_resumes_failed_units(tmp_path, projects):
+    client = FakeClient(projects, failures={"uuid-3": 1})
+    ckpt_file, output = tmp_path / "crawl.ckpt", tmp_path / "out.jsonl"
+
+    failed = Crawler(client, ckpt_file).run(handler, output)
+    assert list(failed) == ["project:uuid-3"]
+    assert len(read_rows(output)) == 9
+
+    # Simulate rows written after the last checkpoint.
+    with output.open("a") as fh:
+        fh.write('{"name": "partial"}\n')
+
+    crawler = Crawler(client, ckpt_file)
+    assert crawler.run(handler, output) == {}
+    assert crawler.checkpoint.finished
+    assert sorted(read_rows(output)) == sorted(p["name"] for p in projects.values())
+
+
+def test_crawl_lookup(tmp_path, projects):
+    identities = {"pkg:maven/org.example/lib@1": [{"project": projects["uuid-7"]}]}
+    projects["uuid-7"]["purl"] = "pkg:maven/org.example/lib@1"
+    client = FakeClient({"uuid-0": projects["uuid-0"]}, identities=identities)
+    client.project.items["uuid-7"] = projects["uuid-7"]
+    ckpt_file = tmp_path / "crawl.ckpt"
+    client.project.list = lambda **kwargs: [{"uuid": "uuid-0"}]
+
+    crawler = Crawler(client, ckpt_file)
+
+    def lookup_handler(project):
+        # Every project depends on the same internal library.
+        crawler.lookup("pkg:maven/org.example/lib@1")
+        yield {"name": project["name"]}
+
+    crawler.run(lookup_handler, tmp_path / "out.jsonl")
+    assert read_rows(tmp_path / "out.jsonl") == ["project-0", "project-7"]
+    assert client.component.lookups == 1
+
+
+def test_checkpoint_worker_mismatch(tmp_path):
+    Checkpoint(tmp_path / "crawl.ckpt", worker=0, workers=2).save()
+    with pytest.raises(ValueError):
+        Checkpoint.load(tmp_path / "crawl.ckpt", worker=1, workers=2)
+
+
+def test_crawl_skips_missing_projects(tmp_path, projects):
+    client = FakeClient(projects)
+    client.project.list = lambda **kwargs: [{"uuid": "uuid-0"}, {"uuid": "deleted"}]
+
+    crawler = Crawler(client, tmp_path / "crawl.ckpt")
+    assert crawler.run(handler, tmp_path / "out.jsonl") == {}
+    assert crawler.checkpoint.finished
+    assert read_rows(tmp_path / "out.jsonl") == ["project-0"]
+
+
+def test_crawl_output_mismatch(tmp_path, projects):
+    client = FakeClient(projects)
+    ckpt_file, output = tmp_path / "crawl.ckpt", tmp_path / "out.jsonl"
+    Crawler(client, ckpt_file, save_every=1).run(handler, output)
+
+    with pytest.raises(ValueError):
+        Crawler(client, ckpt_file).run(handler, tmp_path / "other.jsonl")
+
+    output.unlink()
+    with pytest.raises(ValueError):
+        Crawler(client, ckpt_file).run(handler, output)
+    assert not output.exists()
+
+
+def test_crawl_workers_split(tmp_path, projects):
+    client = FakeClient(projects)
+    crawled = []
+    for worker in range(3):
+        output = tmp_path / f"out-{worker}.jsonl"
+        Crawler(client, tmp_path / f"crawl-{worker}.ckpt", worker, workers=3).run(
+            handler, output
+        )
+        crawled.extend(read_rows(output))
+    assert sorted(crawled) == sorted(p["name"] for p in projects.values())
+
+
+def test_crawl_interrupted_unit(tmp_path, projects):
+    client = FakeClient(projects)
+    ckpt_file, output = tmp_path / "crawl.ckpt", tmp_path / "out.jsonl"
+
+    class InterruptedSet(set):
+        """Interrupt the crawl after writing the rows of uuid-5."""
+
+        def add(self, uuid):
+            if uuid == "uuid-5":
+                raise KeyboardInterrupt
+            super().add(uuid)
+
+    crawler = Crawler(client, ckpt_file)
+    crawler.checkpoint.done = InterruptedSet()
+    with pytest.raises(KeyboardInterrupt):
+        crawler.run(handler, output)
+    assert "project-5" in read_rows(output)
+
+    Crawler(client, ckpt_file).run(handler, output)
+    assert sorted(read_rows(output)) == sorted(p["name"] for p in projects.values())
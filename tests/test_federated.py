@@ -0,0 +1,108 @@
+from time import sleep, time
+
+import pytest
+
+import dependencytrack as dt
+from dependencytrack.federated import FederatedDependencyTrack
+
+
+class FakeProxy:
+    def __init__(self, name, delay):
+        self.name = name
+        self.delay = delay
+
+    def list(self, fields=None, **kwargs):
+        sleep(self.delay)
+        if self.name == "broken":
+            raise dt.exc.InternalServerError(status=500)
+        if self.name == "scalar":
+            return "ab"
+        return [{"name": f"{self.name}-project"}]
+
+    def lookup(self, qp):
+        if self.name != "bu-1":
+            raise dt.exc.NotFound(status=404)
+        return dt.Project(client=None, path="project/p1", data={"uuid": "p1"})
+
+
+class FakeClient:
+    def __init__(self, name, delay=0):
+        self.project = FakeProxy(name, delay)
+
+
+def test_project_list_is_concurrent():
+    fed = FederatedDependencyTrack(
+        {name: FakeClient(name, delay=0.2) for name in ("bu-1", "bu-2", "bu-3")}
+    )
+    start = time()
+    projects = list(fed.project_list())
+    assert time() - start < 0.5
+    assert sorted((p["origin"], p["name"]) for p in projects) == [
+        ("bu-1", "bu-1-project"),
+        ("bu-2", "bu-2-project"),
+        ("bu-3", "bu-3-project"),
+    ]
+
+
+def test_project_list_errors():
+    fed = FederatedDependencyTrack(
+        {name: FakeClient(name) for name in ("bu-1", "broken")}
+    )
+    fed.clients["slow"] = FakeClient("slow", delay=1)
+    start = time()
+    with pytest.raises(dt.exc.InternalServerError):
+        list(fed.project_list())
+    assert time() - start < 0.5
+    del fed.clients["slow"]
+
+    projects = fed.project_list(strict=False)
+    assert [p["origin"] for p in projects] == ["bu-1"]
+    assert list(projects.errors) == ["broken"]
+
+
+def test_project_lookup():
+    fed = FederatedDependencyTrack(
+        {name: FakeClient(name) for name in ("bu-1", "bu-2")}
+    )
+    projects = list(fed.project_lookup("my-app", "1.0"))
+    assert len(projects) == 1
+    assert projects[0]["origin"] == "bu-1"
+
+
+def test_stream_rejects_scalars():
+    fed = FederatedDependencyTrack({"scalar": FakeClient("scalar")})
+    with pytest.raises(TypeError):
+        list(fed.project_list())
+
+
+def test_from_config_files_duplicate_names(tmp_path):
+    for bu in ("bu1", "bu2"):
+        (tmp_path / bu).mkdir()
+        (tmp_path / bu / "dependencytrack.yaml").write_text(
+            "baseurl: https://localhost/api/v1\ntoken: secret\n"
+        )
+    with pytest.raises(ValueError):
+        FederatedDependencyTrack.from_config_files(
+            tmp_path / "bu1" / "dependencytrack.yaml",
+            tmp_path / "bu2" / "dependencytrack.yaml",
+        )
+
+
+def test_no_instances():
+    assert list(FederatedDependencyTrack({}).project_list()) == []
+
+
+def test_interleaved_streams_errors():
+    fed = FederatedDependencyTrack(
+        {name: FakeClient(name) for name in ("bu-1", "broken")}
+    )
+    failing = fed.project_list(strict=False)
+    results = iter(failing)
+    next(results)
+
+    # A second stream does not affect the errors of the first one.
+    other = fed.stream(lambda client: [], strict=False)
+    assert list(other) == []
+    list(results)
+    assert list(failing.errors) == ["broken"]
+    assert other.errors == {}
@@ -0,0 +1,168 @@
+import pytest
+
+from dependencytrack.index import (
+    ComponentIndex,
+    parse_purl,
+    parse_range,
+    version_matches,
+)
+
+
+@pytest.fixture
+def index():
+    index = ComponentIndex()
+    index.update(
+        {"uuid": "p1", "name": "billing", "lastBomImport": 1},
+        components=[
+            {
+                "name": "log4j-core",
+                "group": "org.apache.logging.log4j",
+                "version": "2.14.1",
+                "purl": "pkg:maven/org.apache.logging.log4j/log4j-core@2.14.1",
+            },
+            {
+                "name": "jackson-databind",
+                "group": "com.fasterxml.jackson.core",
+                "version": "2.13.0",
+                "purl": "pkg:maven/com.fasterxml.jackson.core/jackson-databind@2.13.0",
+            },
+        ],
+        services=[{"name": "payments", "group": "io.github", "version": "1.0"}],
+    )
+    index.update(
+        {"uuid": "p2", "name": "shipping", "lastBomImport": 1},
+        components=[
+            {
+                "name": "log4j-core",
+                "group": "org.apache.logging.log4j",
+                "version": "2.17.1",
+                "purl": "pkg:maven/org.apache.logging.log4j/log4j-core@2.17.1",
+            },
+        ],
+    )
+    return index
+
+
+def test_parse_purl():
+    assert parse_purl("pkg:npm/%40angular/core@12.0.0?arch=x86#src") == {
+        "type": "npm",
+        "namespace": "@angular",
+        "name": "core",
+        "version": "12.0.0",
+    }
+    assert parse_purl("pkg:pypi/requests@2.28.2")["namespace"] == ""
+    assert parse_purl(None) == {}
+
+
+@pytest.mark.parametrize(
+    "version,spec,expected",
+    [
+        ("2.14.1", "<2.17", True),
+        ("2.17.0", "<2.17", False),
+        ("2.17.0-rc1", "<2.17.0", True),
+        ("2.9.0", ">=2.0,<2.10", True),
+        ("2.10.0", ">=2.0,<2.10", False),
+        ("1.2.3", "1.2.3", True),
+        ("1.2.3", "!=1.2.3", False),
+        ("2.17.0", "<=2.17", True),
+        ("2.17.0", "==2.17", True),
+        ("2.17.0-rc1", "<2.17", True),
+        ("2.17.0.1", ">2.17", True),
+        ("1.0.0", "!=1.0", False),
+        ("5.4.0.Final", "<5.4.0", False),
+        ("5.4.0.Final", "==5.4", True),
+        ("5.3.0.RELEASE", ">5.3.0-rc1", True),
+        ("v3.0.0", "<2.17", False),
+        ("v1.5.0", ">=1.0", True),
+        ("v2.17.0", "==2.17", True),
+        ("V2.16.0", "<v2.17", True),
+    ],
+)
+def test_version_matches(version, spec, expected):
+    assert version_matches(version, parse_range(spec)) is expected
+
+
+def test_search(index):
+    assert [p["name"] for p in index.projects(name="log4j-core", version="<2.17")] == [
+        "billing"
+    ]
+    assert len(index.search(namespace="org.apache.logging.log4j")) == 2
+    assert len(index.search(name="LOG4J", prefix=True)) == 2
+    assert len(index.search(name="jackson-databnd", fuzzy=True)) == 1
+    assert len(index.search(text="fasterxml")) == 1
+    assert len(index.search(name="payments")) == 1
+    assert index.search(name="log4j-core", group="com.fasterxml.jackson.core") == []
+
+
+def test_update_and_persist(index, tmp_path):
+    index.update({"uuid": "p1", "name": "billing", "lastBomImport": 2})
+    assert index.projects(name="log4j-core") == [
+        {"uuid": "p2", "name": "shipping", "version": None, "lastBomImport": 1}
+    ]
+
+    index.save(tmp_path / "components.idx")
+    loaded = ComponentIndex.load(tmp_path / "components.idx")
+    assert len(loaded) == len(index) == 1
+    assert loaded.projects(name="log4j", prefix=True) == index.projects(
+        name="log4j-core"
+    )
+
+
+def test_sync_reindexes_projects_without_bom(index):
+    class FakeList:
+        def __init__(self, items):
+            self.items = items
+
+        def list(self, fields=None):
+            return self.items
+
+    class FakeProject:
+        data = {"uuid": "p1", "name": "billing", "lastBomImport": None}
+        component = FakeList([{"name": "log4j-core", "version": "2.17.1"}])
+        service = FakeList([])
+
+    class FakeClient:
+        project = FakeList([{"uuid": "p1", "lastBomImport": None}])
+        project.get = lambda uuid: FakeProject()
+
+    index.update({"uuid": "p1", "name": "billing", "lastBomImport": None})
+    index.sync(FakeClient())
+    assert [d["project"] for d in index.search(name="log4j-core")] == ["p1"]
+
+
+def test_sync_is_incremental(index):
+    class FakeList:
+        def __init__(self, items):
+            self.items = items
+
+        def list(self, fields=None):
+            return self.items
+
+    class FakeProject:
+        def __init__(self, uuid):
+            self.data = {"uuid": uuid, "lastBomImport": 2}
+            self.component = FakeList([{"name": "log4j-core", "version": "2.17.2"}])
+            self.service = FakeList([])
+
+    fetched = []
+
+    class FakeClient:
+        project = FakeList(
+            [{"uuid": "p2", "lastBomImport": 1}, {"uuid": "p3", "lastBomImport": 2}]
+        )
+        project.get = lambda uuid: fetched.append(uuid) or FakeProject(uuid)
+
+    # p1 is no longer listed, p2 is unchanged and p3 is new.
+    index.sync(FakeClient())
+    assert fetched == ["p3"]
+    assert sorted(index.project_data) == ["p2", "p3"]
+    assert index.search(name="payments") == []
+
+    # Reindex p2 when its BOM changes.
+    FakeClient.project.items[0]["lastBomImport"] = 2
+    index.sync(FakeClient())
+    assert fetched == ["p3", "p2"]
+    assert [d["version"] for d in index.search(name="log4j-core")] == [
+        "2.17.2",
+        "2.17.2",
+    ]
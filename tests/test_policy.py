@@ -0,0 +1,164 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from dependencytrack.policy import (  # noqa: E402
+    ComponentTable,
+    LicenseRule,
+    PolicyEngine,
+    PurlRule,
+    VersionRule,
+    license_alternatives,
+)
+
+
+@pytest.fixture
+def table():
+    log4j = {
+        "name": "log4j-core",
+        "group": "org.apache.logging.log4j",
+        "resolvedLicense": {"licenseId": "Apache-2.0"},
+    }
+    return ComponentTable.from_components(
+        [
+            (
+                "p1",
+                [
+                    dict(log4j, version="2.14.1"),
+                    {
+                        "name": "left-pad",
+                        "version": "1.3.0",
+                        "purl": "pkg:npm/left-pad@1.3.0",
+                        "license": "WTFPL",
+                    },
+                ],
+            ),
+            (
+                "p2",
+                [
+                    dict(log4j, version="2.17.1"),
+                    {"name": "unlicensed"},
+                    {"name": "dual", "licenseExpression": "MIT OR GPL-3.0-only"},
+                    {"name": "free-text", "license": "GPL-2.0 or later"},
+                ],
+            ),
+        ]
+    )
+
+
+def test_table(table):
+    assert len(table) == 6
+    assert list(table["license"].uniques) == [
+        "Apache-2.0",
+        "WTFPL",
+        "",
+        "GPL-2.0 or later",
+    ]
+    assert list(table["expression"].uniques) == ["", "MIT OR GPL-3.0-only"]
+    assert table.row(1)["purl"] == "pkg:npm/left-pad@1.3.0"
+
+
+def test_rules(table):
+    assert list(LicenseRule(deny=["WTFPL"]).evaluate(table)) == [0, 1, 0, 0, 0, 0]
+    assert list(LicenseRule(allow=["Apache-2.0"]).evaluate(table)) == [
+        0,
+        1,
+        0,
+        1,
+        1,
+        1,
+    ]
+    assert list(LicenseRule(allow=["MIT", "Apache-2.0"]).evaluate(table)) == [
+        0,
+        1,
+        0,
+        1,
+        0,
+        1,
+    ]
+    assert list(LicenseRule(deny=["GPL-3.0-only"]).evaluate(table)) == [0] * 6
+    assert list(VersionRule("log4j-*", "<2.17").evaluate(table)) == [
+        1,
+        0,
+        0,
+        0,
+        0,
+        0,
+    ]
+    assert list(PurlRule("pkg:npm/*").evaluate(table)) == [0, 1, 0, 0, 0, 0]
+
+
+def test_free_text_license():
+    # Free-text names are compared as is, not parsed as SPDX expressions.
+    assert LicenseRule(deny=["GPL-2.0 or later"]).violates_license("GPL-2.0 or later")
+    assert LicenseRule(allow=["GPL-2.0"]).violates_license("GPL-2.0 or later")
+
+    # SPDX operators are case-sensitive.
+    with pytest.raises(ValueError):
+        license_alternatives("MIT or GPL-2.0")
+    assert LicenseRule(allow=["MIT"]).violates_expression("MIT or GPL-2.0")
+
+
+def test_duplicate_rules():
+    table = ComponentTable.from_components(
+        [
+            (
+                "p1",
+                [
+                    {"name": "gpl", "license": "GPL-3.0-only"},
+                    {"name": "agpl", "license": "AGPL-3.0-only"},
+                ],
+            )
+        ]
+    )
+    gpl, agpl = LicenseRule(deny=["GPL-3.0-only"]), LicenseRule(deny=["AGPL-3.0-only"])
+    assert gpl.name == "license deny=GPL-3.0-only"
+    assert PolicyEngine([gpl, agpl]).count(table) == {
+        "p1": {"license deny=GPL-3.0-only": 1, "license deny=AGPL-3.0-only": 1}
+    }
+    with pytest.raises(ValueError):
+        PolicyEngine([LicenseRule(deny=["WTFPL"]), LicenseRule(deny=["WTFPL"])])
+
+
+def test_version_rule_boundary():
+    table = ComponentTable.from_components(
+        [("p1", [{"name": "log4j-core", "version": v} for v in ("2.17.0", "2.17.1")])]
+    )
+    assert list(VersionRule("log4j-core", "<=2.17").evaluate(table)) == [1, 0]
+    assert list(VersionRule("log4j-core", "<2.17").evaluate(table)) == [0, 0]
+
+
+@pytest.mark.parametrize(
+    "expression,expected",
+    [
+        ("", []),
+        ("MIT", [{"MIT"}]),
+        ("MIT OR Apache-2.0", [{"MIT"}, {"Apache-2.0"}]),
+        (
+            "MIT AND (Apache-2.0 OR BSD-3-Clause)",
+            [{"MIT", "Apache-2.0"}, {"MIT", "BSD-3-Clause"}],
+        ),
+        ("GPL-2.0-only WITH Classpath-exception-2.0", [{"GPL-2.0-only"}]),
+    ],
+)
+def test_license_alternatives(expression, expected):
+    assert license_alternatives(expression) == expected
+
+
+def test_engine(table):
+    engine = PolicyEngine(
+        [
+            LicenseRule(allow=["Apache-2.0", "MIT"]),
+            VersionRule("log4j-core", "<2.17", group="org.apache.logging.log4j"),
+        ]
+    )
+    violations = engine.evaluate(table)
+    assert sorted((v["name"], v["rule"]) for v in violations["p1"]) == [
+        ("left-pad", "license allow=Apache-2.0,MIT"),
+        ("log4j-core", "log4j-core <2.17"),
+    ]
+    assert [v["name"] for v in violations["p2"]] == ["unlicensed", "free-text"]
+    assert engine.count(table) == {
+        "p1": {"license allow=Apache-2.0,MIT": 1, "log4j-core <2.17": 1},
+        "p2": {"license allow=Apache-2.0,MIT": 2},
+    }